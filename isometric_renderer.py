@@ -2,8 +2,19 @@
 アイソメトリック座標計算を統一管理するモジュール
 """
 import math
+from itertools import count
 from typing import Tuple, Optional, Dict, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+from mouse_hit_detector import diamond_contains
+
+
+# 回転システムの定数（15度刻みで24方向）
+ROTATION_STEP = 15
+ROTATION_COUNT = 360 // ROTATION_STEP
+
+# CameraState.version の採番用カウンタ（全インスタンスで共有し、作り直したカメラとも番号が重ならないようにする）
+_camera_versions = count(1)
 
 
 @dataclass
@@ -15,6 +26,16 @@ class CameraState:
     offset_y: float = 0.0  # Y軸オフセット
     center_x: float = 128.0  # 画面中心X
     center_y: float = 96.0   # 画面中心Y
+    version: int = field(default=0, compare=False)  # 状態が変わるたびに振り直される版番号
+    
+    def __post_init__(self):
+        object.__setattr__(self, "version", next(_camera_versions))
+    
+    def __setattr__(self, name, value):
+        # 値が実際に変わったときだけ版番号を振り直す（同じ値の再代入ではキャッシュを無効化しない）
+        if name != "version" and getattr(self, name, value) != value:
+            object.__setattr__(self, "version", next(_camera_versions))
+        object.__setattr__(self, name, value)
 
 
 class IsometricRenderer:
@@ -33,7 +54,48 @@ class IsometricRenderer:
         self._coord_cache = {}  # 座標キャッシュ
         self._cache_hits = 0
         self._cache_misses = 0
+        self._base_table_cache = {}  # 回転角度ごとのタイル基準座標テーブル
+        
+        # 回転方向ごとの (cos, sin) テーブル（24方向分を起動時に一度だけ計算）
+        self._trig_lut = tuple(
+            (math.cos(math.radians(i * ROTATION_STEP)), math.sin(math.radians(i * ROTATION_STEP)))
+            for i in range(ROTATION_COUNT)
+        )
+        
+    def set_rotation_index(self, camera_state: CameraState, rotation_index: int) -> int:
+        """
+        回転インデックスからカメラの回転角度を設定
         
+        Args:
+            camera_state: 更新するカメラ状態
+            rotation_index: 回転ステップ番号（0-23、範囲外は折り返し）
+            
+        Returns:
+            正規化された回転インデックス
+        """
+        rotation_index %= ROTATION_COUNT
+        camera_state.rotation = rotation_index * ROTATION_STEP
+        return rotation_index
+    
+    def get_rotation_trig(self, rotation: float) -> Tuple[float, float]:
+        """
+        回転角度の (cos, sin) を取得
+        
+        15度刻みの角度はテーブルを参照し、それ以外の中間角度のみ三角関数を計算する
+        
+        Args:
+            rotation: 回転角度（度）
+            
+        Returns:
+            (cos, sin)
+        """
+        index, remainder = divmod(rotation, ROTATION_STEP)
+        if remainder == 0:
+            return self._trig_lut[int(index) % ROTATION_COUNT]
+        
+        angle_rad = math.radians(rotation)
+        return math.cos(angle_rad), math.sin(angle_rad)
+    
     def clear_cache(self):
         """座標キャッシュをクリア"""
         self._coord_cache.clear()
@@ -67,9 +129,7 @@ class IsometricRenderer:
         if rotation == 0:
             return grid_x, grid_y
             
-        angle_rad = math.radians(rotation)
-        cos_a = math.cos(angle_rad)
-        sin_a = math.sin(angle_rad)
+        cos_a, sin_a = self.get_rotation_trig(rotation)
         
         # 回転中心からの相対座標
         rel_x = grid_x - center[0]
@@ -131,6 +191,46 @@ class IsometricRenderer:
         self._coord_cache[cache_key] = result
         return result
     
+    def get_base_iso_table(self, rotation: float, grid_size: int = 16) -> Tuple[list, list, list]:
+        """
+        グリッド全セルの基準座標テーブルを取得
+        
+        高さ・ズーム・オフセットに依存しない部分（回転後のアイソメトリック座標と深度）は
+        セル位置と回転角度だけで決まるため、回転角度ごとに一度だけ計算してキャッシュする。
+        grid_to_iso() / get_tile_depth() と同じ計算式を使用するため結果は完全に一致する。
+        
+        Args:
+            rotation: 回転角度（度）
+            grid_size: グリッドの一辺のセル数
+            
+        Returns:
+            (base_x, base_y, base_depth) のリスト（インデックスは y * grid_size + x）
+            - base_x: 回転後のアイソメトリックX座標（ズーム前）
+            - base_y: 回転後のアイソメトリックY座標（ズーム前、高さ0）
+            - base_depth: 高さを除いた深度値
+        """
+        cache_key = (rotation, grid_size)
+        table = self._base_table_cache.get(cache_key)
+        if table is not None:
+            return table
+        
+        viewport_center = (8.0, 8.0)  # grid_to_iso()と同じ回転中心
+        half_cell = self.cell_size // 2
+        quarter_cell = self.cell_size // 4
+        base_x = []
+        base_y = []
+        base_depth = []
+        for grid_y in range(grid_size):
+            for grid_x in range(grid_size):
+                rotated_x, rotated_y = self._rotate_coordinates(grid_x, grid_y, rotation, viewport_center)
+                base_x.append((rotated_x - rotated_y) * half_cell)
+                base_y.append((rotated_x + rotated_y) * quarter_cell)
+                base_depth.append(rotated_x + rotated_y)
+        
+        table = (base_x, base_y, base_depth)
+        self._base_table_cache[cache_key] = table
+        return table
+    
     def calculate_diamond_vertices(self, center_x: float, center_y: float, 
                                  scaled_cell_size: int, height: float = 0, zoom: float = 1.0) -> dict:
         """
@@ -204,7 +304,7 @@ class IsometricRenderer:
                            diamond_center_x: float, diamond_center_y: float,
                            diamond_width: float, diamond_height: float) -> bool:
         """
-        点がダイアモンド形状内にあるかを判定（簡易版）
+        点がダイアモンド形状内にあるかを判定
         
         Args:
             point_x, point_y: 判定する点の座標
@@ -214,9 +314,6 @@ class IsometricRenderer:
         Returns:
             点がダイアモンド内にある場合True
         """
-        # 中央の矩形を使った簡易判定
-        half_width = diamond_width // 4
-        half_height = diamond_height // 4
-        
-        return (diamond_center_x - half_width <= point_x <= diamond_center_x + half_width and
-                diamond_center_y - half_height <= point_y <= diamond_center_y + half_height)
+        # ヒット判定と同じ diamond_contains() で判定する（判定式を1か所にまとめる）
+        return diamond_contains(point_x, point_y, diamond_center_x, diamond_center_y,
+                                diamond_width / 2, diamond_height / 2)
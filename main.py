@@ -1,5 +1,4 @@
 import pyxel
-import math
 import random
 import json
 from dataclasses import dataclass, asdict
@@ -23,13 +22,57 @@ class Tile:
 class MapGrid:
     """256x256のマップタイル配列を管理するクラス"""
     
-    def __init__(self, map_size=256):
+    def __init__(self, map_size=256, padding=16):
         self.map_size = map_size
+        self.padding = padding  # ビューポート取得用に周囲を囲む範囲外タイルの幅
         self.tiles = []
+        
+        # 範囲外タイルの枠（マップ内容に依存しないため一度だけ生成して使い回す）
+        self._build_out_of_range_frame()
+        self._padded_rows = []
+        
         # 初期化時のランダム生成をコメントアウト（F2で読み込み、または手動生成）
         # self.generate_random_map()
         self.create_empty_map()
     
+    def _create_out_of_range_tile(self, x, y):
+        """範囲外座標用のダミータイルを作成"""
+        return Tile(
+            floor_id=f"{x:03d}_{y:03d}",
+            height=1,
+            attribute=0,
+            color=0  # 黒
+        )
+    
+    def _build_out_of_range_frame(self):
+        """マップの外周を囲む範囲外タイルの枠を生成"""
+        pad = self.padding
+        x_range = range(-pad, self.map_size + pad)
+        self._frame_top = [
+            [self._create_out_of_range_tile(x, y) for x in x_range]
+            for y in range(-pad, 0)
+        ]
+        self._frame_bottom = [
+            [self._create_out_of_range_tile(x, y) for x in x_range]
+            for y in range(self.map_size, self.map_size + pad)
+        ]
+        self._frame_left = [
+            [self._create_out_of_range_tile(x, y) for x in range(-pad, 0)]
+            for y in range(self.map_size)
+        ]
+        self._frame_right = [
+            [self._create_out_of_range_tile(x, y) for x in range(self.map_size, self.map_size + pad)]
+            for y in range(self.map_size)
+        ]
+    
+    def _rebuild_padded_rows(self):
+        """範囲外タイルの枠で囲んだ行リストを再構築（タイル配列の差し替え後に呼ぶ）"""
+        self._padded_rows = (
+            self._frame_top
+            + [left + row + right for left, row, right in zip(self._frame_left, self.tiles, self._frame_right)]
+            + self._frame_bottom
+        )
+    
     def generate_random_map(self):
         """ランダムなマップデータを生成する"""
         
@@ -68,6 +111,7 @@ class MapGrid:
                 row.append(tile)
             self.tiles.append(row)
         
+        self._rebuild_padded_rows()
     
     def create_empty_map(self):
         """空のマップ（全て基本地形）を生成する"""
@@ -92,6 +136,7 @@ class MapGrid:
                 row.append(tile)
             self.tiles.append(row)
         
+        self._rebuild_padded_rows()
     
     def get_tile(self, x, y):
         """指定座標のタイルを取得（範囲外チェック付き）"""
@@ -101,24 +146,24 @@ class MapGrid:
     
     def get_viewport_tiles(self, start_x, start_y, viewport_size=16):
         """指定座標から16x16のビューポート範囲のタイルを取得"""
-        viewport = []
-        for y in range(viewport_size):
-            row = []
-            for x in range(viewport_size):
-                map_x = start_x + x
-                map_y = start_y + y
-                tile = self.get_tile(map_x, map_y)
-                if tile is None:
-                    # 範囲外の場合はダミータイルを作成
-                    tile = Tile(
-                        floor_id=f"{map_x:03d}_{map_y:03d}",
-                        height=1,
-                        attribute=0,
-                        color=0  # 黒
-                    )
-                row.append(tile)
-            viewport.append(row)
-        return viewport
+        pad = self.padding
+        if (-pad <= start_x and start_x + viewport_size <= self.map_size + pad and
+                -pad <= start_y and start_y + viewport_size <= self.map_size + pad):
+            # 範囲外タイルの枠付き行から切り出す（タイルごとの範囲チェック不要）
+            x0 = start_x + pad
+            x1 = x0 + viewport_size
+            y0 = start_y + pad
+            return [row[x0:x1] for row in self._padded_rows[y0:y0 + viewport_size]]
+        
+        # 枠の外まではみ出す場合はタイルごとに取得（範囲外の場合はダミータイルを作成）
+        # メソッドはローカル変数に束縛し、内包表記でappendの呼び出しを省く
+        get_tile = self.get_tile
+        create_out_of_range_tile = self._create_out_of_range_tile
+        x_range = range(start_x, start_x + viewport_size)
+        return [
+            [get_tile(map_x, map_y) or create_out_of_range_tile(map_x, map_y) for map_x in x_range]
+            for map_y in range(start_y, start_y + viewport_size)
+        ]
     
     def save_to_json(self, filename="map_data.json"):
         """マップデータをJSONファイルに保存"""
@@ -172,6 +217,7 @@ class MapGrid:
             
             # 既存のタイルデータを置き換え
             self.tiles = new_tiles
+            self._rebuild_padded_rows()
             return True
             
         except FileNotFoundError:
@@ -192,6 +238,145 @@ COLOR_TOP = 11
 COLOR_LEFT = 6   # 左側面（ライトグレー）
 COLOR_RIGHT = 5  # 右側面（ダークグレー）
 
+# ズーム倍率（1/256単位の固定小数点 Q8 で管理し、浮動小数点の誤差の蓄積を防ぐ）
+ZOOM_Q8_ONE = 256  # 等倍
+
+# 段階的なズーム倍率（約0.3, 0.5, 0.75, 1, 1.5, 2, 3倍）とインデックスごとのセルサイズ
+ZOOM_LEVELS_Q8 = (77, 128, 192, 256, 384, 512, 768)
+ZOOM_DEFAULT_INDEX = 3  # 等倍
+ZOOM_CELL_SIZES = tuple((CELL_SIZE * zoom_q8) >> 8 for zoom_q8 in ZOOM_LEVELS_Q8)
+
+# ビューポート四隅のコンパス表示用オフセット（マップの実際の方向を指すための4つの基本方向）
+COMPASS_UP = (0, -25)     # 上方向（マップの北）
+COMPASS_RIGHT = (25, 0)   # 右方向（マップの東）
+COMPASS_DOWN = (0, 25)    # 下方向（マップの南）
+COMPASS_LEFT = (-25, 0)   # 左方向（マップの西）
+
+# 回転の象限（rotation_index // 6）ごとの N/E/S/W の表示オフセット
+QUADRANT_OFFSETS = (
+    (COMPASS_UP, COMPASS_RIGHT, COMPASS_DOWN, COMPASS_LEFT),  # 0-5: 基準（N=上, E=右, S=下, W=左）
+    (COMPASS_RIGHT, COMPASS_DOWN, COMPASS_LEFT, COMPASS_UP),  # 6-11: 90度回転（N=右, E=下, S=左, W=上）
+    (COMPASS_DOWN, COMPASS_LEFT, COMPASS_UP, COMPASS_RIGHT),  # 12-17: 180度回転（N=下, E=左, S=上, W=右）
+    (COMPASS_LEFT, COMPASS_UP, COMPASS_RIGHT, COMPASS_DOWN),  # 18-23: 270度回転（N=左, E=上, S=右, W=下）
+)
+
+def build_tile_geometry(base_x, base_y, heights, max_height, center_x, center_y, offset_x, offset_y, zoom_q8):
+    """
+    全タイルの画面座標と側面の高さを計算する
+    
+    IsometricRenderer.grid_to_iso() / calculate_diamond_vertices()と同じ計算式を
+    セル単位のメソッド呼び出しなしでまとめて実行する数値計算専用の関数
+    
+    Args:
+        base_x, base_y: IsometricRenderer.get_base_iso_table()の基準座標
+        heights: タイルの高さ（インデックスは y * size + x）
+        max_height: heights の最大値（側面の高さの表を作る範囲）
+        center_x, center_y: 画面中心
+        offset_x, offset_y: カメラオフセット
+        zoom_q8: ズーム倍率（Q8固定小数点）
+        
+    Returns:
+        (上面左上基準の画面座標X, 画面座標Y, ズーム適用済みの側面の高さ) の3つのリスト
+    """
+    # zoom_q8 / 256 は2進数で正確に表せるため、浮動小数点演算でも描画とヒット判定の結果は一致する
+    zoom = zoom_q8 / ZOOM_Q8_ONE
+    xs = [center_x + bx * zoom + offset_x for bx in base_x]
+    ys = [center_y + (by - height * HEIGHT_UNIT) * zoom + offset_y for by, height in zip(base_y, heights)]
+    # 側面の高さは 0〜max_height の整数の高さごとに一度だけ整数演算で求め（int(height * HEIGHT_UNIT * zoom) と同値）、
+    # 各タイルはその表を引くだけにする
+    table_size = int(max_height) + 1 if max_height > 0 else 1
+    height_offsets = [(height * HEIGHT_UNIT * zoom_q8) >> 8 for height in range(table_size)]
+    # 表に無い高さ（読み込んだマップの負の値や小数）は元の式でそのまま求める
+    scaled_heights = [
+        height_offsets[height] if type(height) is int and 0 <= height < table_size
+        else int(height * HEIGHT_UNIT * zoom)
+        for height in heights
+    ]
+    return xs, ys, scaled_heights
+
+def draw_tiles(target, order, iso_xs, iso_ys, scaled_heights, top_colors, scaled_cell_size):
+    """
+    ソート済みの順序でタイルの側面・上面・枠線を描画する
+    
+    build_tile_geometry()の出力を受け取り、pyxelの描画呼び出しだけを行う関数
+    （ジオメトリ計算と描画の受け渡しはフラットなリストのみで、Appの状態には触れない）
+    
+    Args:
+        target: 描画先（pyxelモジュールまたはpyxel.Image）
+        order: 描画順（奥から手前）に並べたタイルのインデックス
+        iso_xs, iso_ys: build_tile_geometry()で計算した画面座標
+        scaled_heights: ズーム適用済みの側面の高さ
+        top_colors: 上面の色（ホバー/選択状態を反映済み）
+        scaled_cell_size: ズーム適用済みのセルサイズ
+    """
+    # 描画プリミティブをローカル変数に束縛（タイルごとのモジュール属性参照を省く）
+    tri = target.tri
+    line = target.line
+    half_cell = scaled_cell_size // 2
+    quarter_cell = scaled_cell_size // 4
+    
+    # pyxelには複数の図形をまとめて渡すAPIが無いため、1回の呼び出しに渡す引数の準備を最小化する
+    # （ループ内で参照する定数はローカル変数に束縛してグローバル参照を避ける）
+    # 四角形塗りつぶしAPI（Pyxelのバージョンによっては存在しないため描画先ごとに判定）
+    quad = getattr(target, "quad", None)
+    color_left = COLOR_LEFT
+    color_right = COLOR_RIGHT
+    color_outline = COLOR_OUTLINE
+    win_width = WIN_WIDTH
+    win_height = WIN_HEIGHT
+    
+    # ソート済みの順序で描画（奥から手前の順にタイルを描画）
+    # 重なり順を保つため、色ごとにまとめず深度順のまま1タイルずつ描画する
+    for index in order:
+        iso_x = iso_xs[index]
+        iso_y = iso_ys[index]
+        scaled_height = scaled_heights[index]
+
+        # 画面外カリング: タイル全体（上面＋側面）の外接矩形が画面に掛からなければ描画しない
+        # （座標の丸めを考慮して1ピクセルの余裕を持たせる）
+        if (iso_x + scaled_cell_size < -1 or iso_x > win_width or
+                iso_y + half_cell + scaled_height < -1 or iso_y > win_height):
+            continue
+
+        # 上面の4頂点（FT/FL/FR/FB）と側面の下側頂点（BL/BR/BB）をスカラーで保持
+        ftx = iso_x + half_cell
+        fty = iso_y
+        flx = iso_x
+        fly = iso_y + quarter_cell
+        frx = iso_x + scaled_cell_size
+        fry = fly
+        fbx = ftx
+        fby = iso_y + half_cell
+        bly = fly + scaled_height
+        bry = fry + scaled_height
+        bby = fby + scaled_height
+
+        top_color = top_colors[index]
+
+        # 左側面（ライトグレー）、右側面（ダークグレー）、上面（ひし形）の順に塗りつぶす
+        # 側面の高さが0の場合、側面は上面の辺に潰れて上面と枠線で上書きされるため描画しない
+        # （ひし形は回転しても画面上の向きが変わらず、描く2枚の側面は常に手前を向いているので、
+        #  回転角による背面カリングで省ける側面は無い）
+        if quad is None:
+            if scaled_height:
+                tri(flx, fly, fbx, fby, fbx, bby, color_left)
+                tri(flx, fly, fbx, bby, flx, bly, color_left)
+                tri(fbx, fby, frx, fry, frx, bry, color_right)
+                tri(fbx, fby, frx, bry, fbx, bby, color_right)
+            tri(flx, fly, ftx, fty, frx, fry, top_color)
+            tri(flx, fly, frx, fry, fbx, fby, top_color)
+        else:
+            if scaled_height:
+                quad(flx, fly, fbx, fby, fbx, bby, flx, bly, color_left)
+                quad(fbx, fby, frx, fry, frx, bry, fbx, bby, color_right)
+            quad(flx, fly, ftx, fty, frx, fry, fbx, fby, top_color)
+
+        # 上面の枠線を描画
+        line(ftx, fty, flx, fly, color_outline)
+        line(flx, fly, fbx, fby, color_outline)
+        line(fbx, fby, frx, fry, color_outline)
+        line(frx, fry, ftx, fty, color_outline)
+
 class App:
     def __init__(self):
         # IsometricRendererを初期化
@@ -212,6 +397,10 @@ class App:
         self.viewport_y = 120  # マップ中央付近から開始
         self.viewport_size = VIEWPORT_SIZE  # 16x16を表示
         
+        # ズーム段階（camera_state.zoom はここから導出する）
+        self.zoom_index = ZOOM_DEFAULT_INDEX
+        self.zoom_q8 = ZOOM_LEVELS_Q8[self.zoom_index]
+        
         # 回転システム
         self.rotation_step = 15  # 15度刻み
         self.rotation_index = 0  # 現在の回転ステップ番号
@@ -235,6 +424,27 @@ class App:
         self.mouse_y = 0
         self.hovered_tile = None  # マウスオーバー中のタイル
         self.selected_tile = None  # 選択されたタイル
+        self._last_hover_inputs = None  # ホバー判定を行った時の入力（マウス座標・カメラ状態・表示タイル）
+        self._tiles_version = 0  # 表示タイルが変わるたびに増える番号
+        
+        # Z-ソート結果のキャッシュ
+        self._sort_cache = {}  # 回転角度→描画順のタイル番号（表示タイルが変わったら破棄）
+        
+        # ジオメトリ計算の結果（update_tile_geometry()がカメラ状態か表示タイルが変わった時に差し替える）
+        tile_count = VIEWPORT_SIZE * VIEWPORT_SIZE
+        self._geom_x = []
+        self._geom_y = []
+        self._geom_scaled_height = []
+        self._geometry_key = None  # 結果を計算したときのカメラ状態（表示タイルが変わったら破棄）
+        self._top_colors = [0] * tile_count  # ホバー/選択を反映した上面の色
+        
+        # UIコンパスの方角ラベル位置（回転インデックスが変わったときだけ計算し直す）
+        self._compass_labels = []
+        self._compass_rotation_index = None
+        
+        # タイル描画のオフスクリーンキャッシュ（pyxel.init()後に作成、キーが変わったフレームだけ描き直す）
+        self._scene_image = None
+        self._scene_key = None
         
         # JSON操作のフィードバック
         self.last_save_load_message = ""
@@ -264,6 +474,7 @@ class App:
         
         pyxel.init(WIN_WIDTH, WIN_HEIGHT, title="Grid Maddness")
         pyxel.mouse(True)  # マウスカーソルを表示
+        self._scene_image = pyxel.Image(WIN_WIDTH, WIN_HEIGHT)
         pyxel.run(self.update, self.draw)
     
     def update_viewport_tiles(self):
@@ -275,6 +486,16 @@ class App:
         # 修正版ViewportManagerを使用（force_update付き）
         self.current_tiles = self.viewport_manager.get_current_tiles()
         
+        # 表示タイルが変わったのでホバー判定とタイル描画をやり直す
+        self._tiles_version += 1
+        self._scene_key = None
+        self._geometry_key = None
+        self._sort_cache.clear()
+        
+        # 描画ループ用にタイルの高さと色を1次元配列（y * size + x）へ展開
+        self._tile_heights = self.viewport_manager.current_heights
+        self._tile_colors = [tile.color for tile in self.viewport_manager.get_current_tiles_flat()]
+        self._max_tile_height = max(self._tile_heights)
     
     @property
     def current_angle(self):
@@ -283,31 +504,23 @@ class App:
     
     def update_camera_rotation(self):
         """回転インデックスからカメラ状態を更新"""
-        self.camera_state.rotation = self.current_angle
-    
-    def get_tile_depth(self, grid_x, grid_y):
-        """Z-ソート用にタイルの描画順を決めるための深度値を計算する"""
-        tile = self.current_tiles[grid_y][grid_x]
-        return self.iso_renderer.get_tile_depth(grid_x, grid_y, tile.height, self.camera_state)
+        self.rotation_index = self.iso_renderer.set_rotation_index(self.camera_state, self.rotation_index)
     
-    def is_point_in_center_rect(self, point_x, point_y, diamond_center_x, diamond_center_y, diamond_width, diamond_height):
-        """中央の矩形を用いたシンプルな当たり判定を行う"""
-        # 矩形のサイズ（ひし形の幅・高さの50%を中央に）
-        rect_width = diamond_width * 0.5
-        rect_height = diamond_height * 0.5
-        left = diamond_center_x - rect_width / 2
-        right = diamond_center_x + rect_width / 2
-        top = diamond_center_y - rect_height / 2
-        bottom = diamond_center_y + rect_height / 2
-        return left <= point_x <= right and top <= point_y <= bottom
+    def set_zoom_index(self, zoom_index):
+        """ズーム段階を範囲内に収めて設定し、カメラ状態に反映する"""
+        self.zoom_index = max(0, min(zoom_index, len(ZOOM_LEVELS_Q8) - 1))
+        self.zoom_q8 = ZOOM_LEVELS_Q8[self.zoom_index]
+        self.camera_state.zoom = self.zoom_q8 / ZOOM_Q8_ONE
     
     def get_tile_at_mouse(self):
         """マウスカーソル下にあるタイルを返す（MouseHitDetector使用）"""
+        # 描画と同じタイルの画面座標を渡し、ヒット判定側での再計算を省く
+        self.update_tile_geometry()
         return self.mouse_hit_detector.get_tile_at_mouse(
             self.mouse_x, self.mouse_y, 
             self.camera_state, 
-            self.current_tiles,
-            WIN_WIDTH, WIN_HEIGHT
+            self._tile_heights,
+            self._geom_x, self._geom_y
         )
     
     def draw_compass_ui(self):
@@ -322,6 +535,25 @@ class App:
         pyxel.circb(compass_center_x, compass_center_y, radius, 7) # 外枠
         pyxel.circ(compass_center_x, compass_center_y, radius - 6, 0) # 内側を黒で塗りつぶし
 
+        # ラベル位置は回転角度だけで決まるため、回転が変わったときだけ三角関数で計算し直す
+        if self._compass_rotation_index != self.rotation_index:
+            self._compass_labels = self.build_compass_labels(compass_center_x, compass_center_y, radius)
+            self._compass_rotation_index = self.rotation_index
+        
+        for text_x, text_y, label, color in self._compass_labels:
+            pyxel.text(text_x, text_y, label, color)
+    
+    def build_compass_labels(self, compass_center_x, compass_center_y, radius):
+        """
+        UIコンパスの方角ラベルの描画位置を計算する
+        
+        Args:
+            compass_center_x, compass_center_y: コンパスの中心座標
+            radius: コンパスの半径
+            
+        Returns:
+            (x, y, ラベル, 色) のリスト
+        """
         # 現在のカメラの回転角度（度）
         camera_angle_deg = self.current_angle
 
@@ -341,106 +573,65 @@ class App:
         # }
 
 
+        labels = []
         for label, angle_deg in directions.items():
             # カメラの回転を適用した最終的な角度
             final_angle_deg = angle_deg + camera_angle_deg
-            final_angle_rad = math.radians(final_angle_deg)
+            cos_a, sin_a = self.iso_renderer.get_rotation_trig(final_angle_deg)
 
             # ラベルの描画位置を計算
-            text_x = compass_center_x + (radius - 4) * math.sin(final_angle_rad)
-            text_y = compass_center_y - (radius - 4) * math.cos(final_angle_rad)
+            text_x = compass_center_x + (radius - 4) * sin_a
+            text_y = compass_center_y - (radius - 4) * cos_a
 
             # 北（N）を赤で強調表示
             color = 8 if label == "N" else 7
 
-            # 文字を描画（中央揃えのため微調整）
-            pyxel.text(
+            # 文字の描画位置（中央揃えのため微調整）
+            labels.append((
                 int(text_x - pyxel.FONT_WIDTH / 2),
                 int(text_y - pyxel.FONT_HEIGHT / 2),
                 label,
                 color
-            )
+            ))
+        
+        return labels
 
     def draw_compass_on_viewport(self):
         """ビューポート四隅にNEWS方角を表示（回転対応）"""
         
-        # 4つの角の座標と、その位置に表示する固定の方角
+        # 4つの角の座標と、その位置に表示する固定の方角（QUADRANT_OFFSETSの列番号付き）
         compass_positions = [
-            (0, 0, "N"),                    # 左上の角に北（N）
-            (0, self.viewport_size-1, "W"), # 左下の角に西（W）
-            (self.viewport_size-1, 0, "E"), # 右上の角に東（E）
-            (self.viewport_size-1, self.viewport_size-1, "S") # 右下の角に南（S）
+            (0, 0, "N", 0),                    # 左上の角に北（N）
+            (0, self.viewport_size-1, "W", 3), # 左下の角に西（W）
+            (self.viewport_size-1, 0, "E", 1), # 右上の角に東（E）
+            (self.viewport_size-1, self.viewport_size-1, "S", 2) # 右下の角に南（S）
         ]
         
-        for grid_x, grid_y, direction in compass_positions:
-            # IsometricRendererを使用してタイル座標を取得
-            tile = self.current_tiles[grid_y][grid_x]
-            iso_x, iso_y = self.iso_renderer.grid_to_iso(grid_x, grid_y, tile.height, self.camera_state)
-            
-            # ズーム適用されたセルサイズ
-            scaled_cell_size = int(CELL_SIZE * self.camera_state.zoom)
-            
+        # 回転の象限に応じてN/E/S/Wの表示方向を割り当て
+        # これにより、ビューポートが回転してもマップの実際の方向を指す
+        quadrant_offsets = QUADRANT_OFFSETS[(self.rotation_index // 6) % 4]
+        
+        # ひし形の中心までのオフセット（ズーム段階ごとのセルサイズから一度だけ計算）
+        scaled_cell_size = ZOOM_CELL_SIZES[self.zoom_index]
+        half_cell = scaled_cell_size // 2
+        quarter_cell = scaled_cell_size // 4
+        
+        # タイルの画面座標は描画と共有しているジオメトリ計算の結果から取得
+        self.update_tile_geometry()
+        iso_xs = self._geom_x
+        iso_ys = self._geom_y
+        size = self.viewport_size
+        
+        for grid_x, grid_y, direction, offset_index in compass_positions:
             # ひし形の中心座標を計算
-            tile_center_x = iso_x + scaled_cell_size // 2
-            tile_center_y = iso_y + scaled_cell_size // 4
-            
-            # 固定オフセット表（マップの実際の方向を指すための4つの基本方向）
-            up_offset = (0, -25)      # 上方向（マップの北）
-            right_offset = (25, 0)    # 右方向（マップの東）  
-            down_offset = (0, 25)     # 下方向（マップの南）
-            left_offset = (-25, 0)    # 左方向（マップの西）
-            
-            # 回転に応じてN/E/S/Wの表示方向を割り当て
-            # これにより、ビューポートが回転してもマップの実際の方向を指す
-            if 0 <= self.rotation_index <= 5:
-                # 0-5: 基準（N=上, E=右, S=下, W=左）
-                n_offset = up_offset
-                e_offset = right_offset
-                s_offset = down_offset
-                w_offset = left_offset
-                
-            elif 6 <= self.rotation_index <= 11:
-                # 6-11: 90度回転（N=右, E=下, S=左, W=上）
-                n_offset = right_offset
-                e_offset = down_offset
-                s_offset = left_offset
-                w_offset = up_offset
-                
-            elif 12 <= self.rotation_index <= 17:
-                # 12-17: 180度回転（N=下, E=左, S=上, W=右）
-                n_offset = down_offset
-                e_offset = left_offset
-                s_offset = up_offset
-                w_offset = right_offset
-                
-            elif 18 <= self.rotation_index <= 23:
-                # 18-23: 270度回転（N=左, E=上, S=右, W=下）
-                n_offset = left_offset
-                e_offset = up_offset
-                s_offset = right_offset
-                w_offset = down_offset
-            else:
-                # デフォルト: rotation_indexが範囲外の場合は基準設定を使用
-                n_offset = up_offset
-                e_offset = right_offset
-                s_offset = down_offset
-                w_offset = left_offset
+            index = grid_y * size + grid_x
+            tile_center_x = iso_xs[index] + half_cell
+            tile_center_y = iso_ys[index] + quarter_cell
             
-            text_x = 0
-            text_y = 0
             # 各方角に応じたオフセットを適用して表示位置を決定
-            if direction == "N":
-                text_x = tile_center_x + n_offset[0]
-                text_y = tile_center_y + n_offset[1]
-            elif direction == "E":
-                text_x = tile_center_x + e_offset[0]
-                text_y = tile_center_y + e_offset[1]
-            elif direction == "S":
-                text_x = tile_center_x + s_offset[0]
-                text_y = tile_center_y + s_offset[1]
-            elif direction == "W":
-                text_x = tile_center_x + w_offset[0]
-                text_y = tile_center_y + w_offset[1]
+            offset_x, offset_y = quadrant_offsets[offset_index]
+            text_x = tile_center_x + offset_x
+            text_y = tile_center_y + offset_y
             
             # 画面範囲内チェック
             if 0 <= text_x < WIN_WIDTH and 0 <= text_y < WIN_HEIGHT:
@@ -487,26 +678,18 @@ class App:
             self.rotation_index = (self.rotation_index + 1) % self.max_rotations
             self.update_camera_rotation()
         
-        # ズーム機能（Z/Xキー）
-        if pyxel.btn(pyxel.KEY_Z):
-            self.camera_state.zoom += 0.05  # 少しずつズーム
-            if self.camera_state.zoom > 3.0:  # 最大3倍まで
-                self.camera_state.zoom = 3.0
-        if pyxel.btn(pyxel.KEY_X):
-            self.camera_state.zoom -= 0.05  # 少しずつズームアウト
-            if self.camera_state.zoom < 0.3:  # 最小0.3倍まで
-                self.camera_state.zoom = 0.3
+        # ズーム機能（Z/Xキー、0.3倍〜3倍を1段ずつ）
+        if pyxel.btnp(pyxel.KEY_Z):
+            self.set_zoom_index(self.zoom_index + 1)  # ズームイン
+        if pyxel.btnp(pyxel.KEY_X):
+            self.set_zoom_index(self.zoom_index - 1)  # ズームアウト
         
         # マウスホイールズーム
         wheel_y = pyxel.mouse_wheel
         if wheel_y > 0:  # ホイール前方向（上）= ズームイン
-            self.camera_state.zoom += 0.1
-            if self.camera_state.zoom > 3.0:
-                self.camera_state.zoom = 3.0
+            self.set_zoom_index(self.zoom_index + 1)
         elif wheel_y < 0:  # ホイール後方向（下）= ズームアウト
-            self.camera_state.zoom -= 0.1
-            if self.camera_state.zoom < 0.3:
-                self.camera_state.zoom = 0.3
+            self.set_zoom_index(self.zoom_index - 1)
         
         # リセット処理（Cキー）
         if pyxel.btnp(pyxel.KEY_C):
@@ -522,9 +705,10 @@ class App:
                 center_x=self.initial_camera_state.center_x,
                 center_y=self.initial_camera_state.center_y
             )
-            # 回転をリセット
+            # 回転とズームをリセット
             self.rotation_index = self.initial_rotation_index
             self.update_camera_rotation()
+            self.set_zoom_index(ZOOM_DEFAULT_INDEX)
             
             # 各種キャッシュをクリア（ViewportManagerが自動でcurrent_tilesも更新）
             self.iso_renderer.clear_cache()
@@ -544,6 +728,13 @@ class App:
         if pyxel.btn(pyxel.KEY_DOWN):
             self.camera_state.offset_y -= 2  # 下キーで上方向に移動（リバース）
         
+        # マウスオーバー中のタイルを更新（マウス座標・カメラ状態・表示タイルのいずれかが変わった時だけ判定し直す）
+        camera_state = self.camera_state
+        hover_inputs = (self.mouse_x, self.mouse_y, camera_state.version, self._tiles_version)
+        if hover_inputs != self._last_hover_inputs:
+            self.hovered_tile = self.get_tile_at_mouse()
+            self._last_hover_inputs = hover_inputs
+        
         # マウスクリックでタイル選択 + 脳汁エフェクト発動！
         if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
             if self.hovered_tile:
@@ -611,69 +802,82 @@ class App:
         # エフェクトシステムの更新（脳汁システム稼働中！）
         self.effects_system.update()
 
-    def rect_poly(self, p0, p1, p2, p3, color):
-        """4頂点の平行四辺形を2つの三角形で塗りつぶす"""
-        pyxel.tri(p0[0], p0[1], p1[0], p1[1], p2[0], p2[1], color)
-        pyxel.tri(p0[0], p0[1], p2[0], p2[1], p3[0], p3[1], color)
-
-    def rect_polyb(self, p0, p1, p2, p3, color):
-        """4頂点の平行四辺形に枠線を描画"""
-        pyxel.line(p0[0], p0[1], p1[0], p1[1], color)
-        pyxel.line(p1[0], p1[1], p2[0], p2[1], color)
-        pyxel.line(p2[0], p2[1], p3[0], p3[1], color)
-        pyxel.line(p3[0], p3[1], p0[0], p0[1], color)
-
-    def draw_diamond_tile(self, grid_x, grid_y):
-        """指定されたグリッド位置にダイアモンド型タイルを高さ付きで描画"""
-        # 現在のビューポートタイルから高さを取得
-        tile = self.current_tiles[grid_y][grid_x]
-        
-        # IsometricRendererを使用してアイソメトリック座標を計算
-        iso_x, iso_y = self.iso_renderer.grid_to_iso(grid_x, grid_y, tile.height, self.camera_state)
-        
-        # ズーム適用されたセルサイズ
-        scaled_cell_size = int(CELL_SIZE * self.camera_state.zoom)
-        
-        # IsometricRendererを使用してダイアモンドの頂点座標を計算
-        # 注意: ズームとスケールを適用した高さ情報も渡す
-        vertices = self.iso_renderer.calculate_diamond_vertices(iso_x, iso_y, scaled_cell_size, tile.height, self.camera_state.zoom)
-        
-        # 頂点を取得
-        FT = vertices['top']
-        FL = vertices['left']
-        FR = vertices['right']
-        FB = vertices['bottom']
-        BL = vertices['bottom_left']
-        BR = vertices['bottom_right']
-        BB = vertices['bottom_bottom']
-        
-        # 左側面を描画（ライトグレー）
-        self.rect_poly(FL, FB, BB, BL, COLOR_LEFT)
-        
-        # 右側面を描画（ダークグレー）
-        self.rect_poly(FB, FR, BR, BB, COLOR_RIGHT)
-        
-        # 色の決定（ホバー/選択状態を考慮）
-        top_color = tile.color
-        
-        # マウスオーバーまたは選択状態の場合は色を変更
-        is_hovered = self.hovered_tile == (grid_x, grid_y)
-        is_selected = self.selected_tile == (grid_x, grid_y)
+    def update_tile_geometry(self):
+        """
+        現在のカメラ状態でのタイルの画面座標と側面の高さを計算する
+        
+        描画とマウスのヒット判定で同じ計算結果を共有し、カメラ状態か表示タイルが
+        変わったときだけ計算し直す
+        """
+        camera_state = self.camera_state
+        geometry_key = (camera_state.offset_x, camera_state.offset_y,
+                        camera_state.center_x, camera_state.center_y,
+                        camera_state.rotation, self.zoom_q8)
+        if geometry_key == self._geometry_key:
+            return
+        
+        # 回転角度ごとに事前計算済みのセル基準座標（高さ・ズーム・オフセットを除いた部分）
+        base_x, base_y, _ = self.iso_renderer.get_base_iso_table(camera_state.rotation, self.viewport_size)
+        self._geom_x, self._geom_y, self._geom_scaled_height = build_tile_geometry(
+            base_x, base_y, self._tile_heights, self._max_tile_height,
+            camera_state.center_x, camera_state.center_y,
+            camera_state.offset_x, camera_state.offset_y, self.zoom_q8
+        )
+        self._geometry_key = geometry_key
+    
+    def draw_tile_scene(self, target):
+        """
+        ビューポートのタイルを深度順に描画する
         
-        if is_selected:
-            top_color = 9  # 青色（選択状態）
-        elif is_hovered:
-            top_color = 10  # 緑色（ホバー状態）
+        Args:
+            target: 描画先（pyxelモジュールまたはpyxel.Image）
+        """
+        target.cls(0)
         
-        # 上面（ひし形）を描画
-        self.rect_poly(FL, FT, FR, FB, top_color)
+        # Z-ソート: 深度順にタイルを並べる
+        # 各タイルの描画深度を求めて並べる
+        size = self.viewport_size
+        heights = self._tile_heights
+        camera_state = self.camera_state
+        
+        # 描画順は回転角度と高さだけで決まるため、回転角度ごとにキャッシュして使い回す
+        order = self._sort_cache.get(camera_state.rotation)
+        if order is None:
+            # 回転角度ごとに事前計算済みのセル基準座標の深度（高さを除いた部分）
+            _, _, base_depth = self.iso_renderer.get_base_iso_table(camera_state.rotation, size)
+            
+            # 深度も基準テーブルとの要素ごとの演算として一括で計算する
+            # （キャッシュが外れた時だけ通る経路なので、作業用のリストはその場で作る）
+            depths = [depth - height * 0.1 for depth, height in zip(base_depth, heights)]
+            
+            # 深度順にソート（小さい値から大きい値へ = 奥から手前へ、同じ深度のタイルは y, x 順を保つ）
+            order = sorted(range(len(depths)), key=depths.__getitem__)
+            self._sort_cache[camera_state.rotation] = order
+        
+        # フレーム内で不変なスケール値はズーム段階ごとの事前計算テーブルから取得
+        scaled_cell_size = ZOOM_CELL_SIZES[self.zoom_index]
+        
+        # ジオメトリ計算パス: 全タイルの画面座標と側面の高さを一括で計算し（ヒット判定と共有）、
+        # 描画呼び出しのループでは参照するだけにする
+        self.update_tile_geometry()
+        iso_xs = self._geom_x
+        iso_ys = self._geom_y
+        scaled_heights = self._geom_scaled_height
+        
+        # 上面の色を描画前に確定（ホバー/選択状態の上書きはループの外で一度だけ行う）
+        top_colors = self._top_colors
+        top_colors[:] = self._tile_colors
+        if self.hovered_tile:
+            hovered_x, hovered_y = self.hovered_tile
+            top_colors[hovered_y * size + hovered_x] = 10  # 緑色（ホバー状態）
+        if self.selected_tile:
+            selected_x, selected_y = self.selected_tile
+            top_colors[selected_y * size + selected_x] = 9  # 青色（選択状態、ホバーより優先）
         
-        # 上面の枠線を描画
-        self.rect_polyb(FT, FL, FB, FR, COLOR_OUTLINE)
-
+        # ソート済みの順序で描画（奥から手前の順にタイルを描画）
+        draw_tiles(target, order, iso_xs, iso_ys, scaled_heights, top_colors, scaled_cell_size)
+    
     def draw(self):
-        pyxel.cls(0)
-        
         # 画面振動エフェクトのオフセットを取得
         shake_x, shake_y = self.effects_system.get_screen_shake_offset()
         
@@ -683,23 +887,18 @@ class App:
         self.camera_state.offset_x += shake_x
         self.camera_state.offset_y += shake_y
         
-        # マウスオーバー中のタイルを更新
-        self.hovered_tile = self.get_tile_at_mouse()
-        
-        # Z-ソート: 深度順にタイルを並べる
-        # 各タイルの描画深度を求め配列に格納
-        tiles_with_depth = []
-        for y in range(self.viewport_size):
-            for x in range(self.viewport_size):
-                depth = self.get_tile_depth(x, y)
-                tiles_with_depth.append((depth, x, y))
-        
-        # 深度順にソート（小さい値から大きい値へ = 奥から手前へ）
-        tiles_with_depth.sort(key=lambda item: item[0])
-        
-        # ソート済みの順序で描画（奥から手前の順にタイルを描画）
-        for depth, x, y in tiles_with_depth:
-            self.draw_diamond_tile(x, y)
+        # タイル描画はオフスクリーン画像にキャッシュし、視点・ズーム・ホバー/選択・表示タイルの
+        # いずれかが変わったフレームだけ描き直す（それ以外のフレームは画像を1回転送するだけ）
+        camera_state = self.camera_state
+        scene_key = (camera_state.offset_x, camera_state.offset_y,
+                     camera_state.center_x, camera_state.center_y, camera_state.rotation,
+                     self.zoom_q8, self.hovered_tile, self.selected_tile)
+        if scene_key != self._scene_key:
+            self.draw_tile_scene(self._scene_image)
+            self._scene_key = scene_key
+        
+        # 画面全体を上書きするため、cls()による消去は不要
+        pyxel.blt(0, 0, self._scene_image, 0, 0, WIN_WIDTH, WIN_HEIGHT)
         
         # 方角表示を描画
         self.draw_compass_ui()
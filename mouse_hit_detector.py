@@ -4,10 +4,15 @@
 import math
 import logging
 import os
+from collections import OrderedDict
 from typing import Optional, Tuple, List, Dict, Any
 from dataclasses import dataclass
 
 
+# 画面空間ハッシュのバケットサイズ（32ピクセル四方 = 1 << 5）
+SCREEN_HASH_SHIFT = 5
+
+
 @dataclass
 class HitResult:
     """ヒット検出結果"""
@@ -16,7 +21,49 @@ class HitResult:
     map_x: int
     map_y: int
     depth: float
-    distance_from_center: float
+    distance_sq_from_center: float  # マウス位置からタイル中心までの距離の2乗
+
+
+def diamond_contains(px: float, py: float, center_x: float, center_y: float,
+                     half_width: int, half_height: int) -> bool:
+    """
+    点がひし形の内側または辺上にあるかどうかを判定
+    
+    中心からの距離を各半径で正規化した和が1以下（|dx|/a + |dy|/b <= 1）という条件を、
+    割り算を使わない形（|dx|*b + |dy|*a <= a*b）で判定する
+    
+    Args:
+        px, py: 判定する点の座標
+        center_x, center_y: ひし形の中心座標
+        half_width, half_height: ひし形の横・縦の半径
+        
+    Returns:
+        ひし形内にあるかどうか
+    """
+    return abs(px - center_x) * half_height + abs(py - center_y) * half_width <= half_width * half_height
+
+
+def find_first_diamond_hit(px: float, py: float, entries, half_width: int, half_height: int):
+    """
+    手前から順に並んだ候補の中で、点を含む最初のひし形を返す
+    
+    diamond_contains()と同じ判定を候補列全体に対して1つのループで行う
+    （候補ごとの関数呼び出しを省き、半径の積はループの外で一度だけ求める）
+    
+    Args:
+        px, py: 判定する点の座標
+        entries: (depth, height, grid_x, grid_y, iso_x, iso_y) のタプルを手前から奥の順に並べた列
+        half_width, half_height: ひし形の横・縦の半径
+        
+    Returns:
+        点を含む最初の候補のタプル、どれにも含まれなければNone
+    """
+    # ひし形の中心は上面の左上 (iso_x, iso_y) から半径分ずらした位置
+    area = half_width * half_height
+    for entry in entries:
+        if abs(px - (entry[4] + half_width)) * half_height + abs(py - (entry[5] + half_height)) * half_width <= area:
+            return entry
+    return None
 
 
 class MouseHitDetector:
@@ -39,6 +86,9 @@ class MouseHitDetector:
         self.height_unit = height_unit
         self.debug_mode = debug_mode
         
+        # 候補の走査はデバッグモードかどうかで実装を切り替える（通常時の判定ループにログ用の分岐を残さない）
+        self._find_front_hit = self._find_front_hit_debug if debug_mode else find_first_diamond_hit
+        
         # デバッグログの設定
         if self.debug_mode:
             # 既存のログファイルを削除（確実な上書きのため）
@@ -65,96 +115,83 @@ class MouseHitDetector:
         self.cache_hits = 0
         self.cache_misses = 0
         
-        # 結果キャッシュ（マウス座標→結果）
-        self.result_cache: Dict[Tuple[int, int], Optional[HitResult]] = {}
-        self.cache_max_size = 50
+        # 結果キャッシュ（(マウスX, マウスY, カメラの版番号, ビューポートX, ビューポートY)→結果、参照順を保持するLRU）
+        self.result_cache: "OrderedDict[Tuple[int, int, int, int, int], Optional[HitResult]]" = OrderedDict()
+        self.cache_max_size = 256
+        
+        # 画面空間ハッシュ（バケット座標→そのバケットに掛かるタイルのリスト）
+        self._screen_hash: Dict[Tuple[int, int], List[tuple]] = {}
+        self._screen_hash_key = None
+        self._screen_hash_cell_size = 0
     
-    def get_tile_at_mouse(self, mouse_x: int, mouse_y: int, camera_state, current_tiles, 
-                         win_width: int = 256, win_height: int = 192) -> Optional[Tuple[int, int]]:
+    def get_tile_at_mouse(self, mouse_x: int, mouse_y: int, camera_state, heights: List[int],
+                         screen_xs: Optional[List[float]] = None,
+                         screen_ys: Optional[List[float]] = None) -> Optional[Tuple[int, int]]:
         """
         マウス座標からタイルを検出（最適化版）
         
         Args:
             mouse_x, mouse_y: マウス座標
             camera_state: カメラ状態
-            current_tiles: 現在のビューポートタイル
-            win_width, win_height: ウィンドウサイズ
+            heights: 現在のビューポートタイルの高さ（行優先の1次元リスト、インデックスは y * size + x）
+            screen_xs, screen_ys: 描画側で計算済みのタイル上面の画面座標（省略時はここで計算）
             
         Returns:
             ヒットしたタイルの座標 (grid_x, grid_y) または None
         """
         self.hit_tests += 1
         
-        # キャッシュチェック
-        cache_key = (mouse_x, mouse_y)
+        # キャッシュチェック（カメラの版番号と表示位置をキーに含め、カメラ移動後に古い結果を返さない）
+        viewport_state = self.viewport_manager.viewport_state
+        cache_key = (mouse_x, mouse_y, camera_state.version, viewport_state.x, viewport_state.y)
         if cache_key in self.result_cache:
             self.cache_hits += 1
+            self.result_cache.move_to_end(cache_key)
             result = self.result_cache[cache_key]
             return (result.grid_x, result.grid_y) if result else None
         
         self.cache_misses += 1
         
-        # 逆座標変換でおおよそのグリッド座標を計算
-        candidates = self._get_candidate_tiles(mouse_x, mouse_y, camera_state, win_width, win_height)
+        # 画面空間ハッシュを必要に応じて作り直し、マウス位置のバケットに入っているタイルだけを判定
+        self._update_screen_hash(camera_state, heights, screen_xs, screen_ys)
+        bucket = self._screen_hash.get((mouse_x >> SCREEN_HASH_SHIFT, mouse_y >> SCREEN_HASH_SHIFT), ())
         
-        # 候補タイルに対して精密な当たり判定
-        best_hit = None
+        # ひし形の半径（横・縦）は呼び出しごとに一度だけ計算し、判定ループでは参照するだけにする
+        # ズーム段階ごとのセルサイズは4の倍数なので、上下・左右の頂点は中心に対して対称になる
+        scaled_cell_size = self._screen_hash_cell_size
+        half_width = scaled_cell_size // 2
+        half_height = scaled_cell_size // 4
         
-        viewport_state = self.viewport_manager.viewport_state
-        
-        # 候補タイルを深度と高さでソート（手前から奥、高い床から低い床）
-        candidate_tiles = []
-        for viewport_x, viewport_y in candidates:
-            # ビューポート座標をマップ座標に変換
+        # バケット内は手前（深度が大きい）から奥の順に並んでいるため、最初にヒットしたタイルが
+        # 画面上で一番手前に見えているタイル（高いタイルによる遮蔽も反映される）
+        best_hit = None
+        entry = self._find_front_hit(mouse_x, mouse_y, bucket, half_width, half_height)
+        if entry is not None:
+            depth, height, viewport_x, viewport_y, iso_x, iso_y = entry
             map_x = viewport_x + viewport_state.x
             map_y = viewport_y + viewport_state.y
             
-            # 実際の256x256マップからタイルを取得
-            tile = self.viewport_manager.get_tile_cached(map_x, map_y)
+            # マウス位置からタイル中心（ひし形の中心）までの距離
+            # （比較にしか使わないため平方根は取らず、2乗のまま保持する）
+            center_x = iso_x + half_width
+            center_y = iso_y + half_height
+            dx = mouse_x - center_x
+            dy = mouse_y - center_y
+            distance_sq = dx * dx + dy * dy
             
-            if tile is None:
-                continue
-                
-            # 深度計算
-            depth = self.isometric_renderer.get_tile_depth(viewport_x, viewport_y, tile.height, camera_state)
+            # デバッグログ出力（デバッグモード時のみ、ヒットした1タイルについて1回）
+            if self.debug_mode:
+                self._log_hit(mouse_x, mouse_y, viewport_x, viewport_y, height, depth,
+                              center_x, center_y, distance_sq, map_x, map_y)
             
-            candidate_tiles.append((viewport_x, viewport_y, tile, map_x, map_y, depth))
-        
-        # ソート: 1. 深度（手前から奥）, 2. 高さ（高い床から低い床）
-        candidate_tiles.sort(key=lambda x: (x[5], -x[2].height))  # depth昇順, height降順
-        
-        for viewport_x, viewport_y, tile, map_x, map_y, depth in candidate_tiles:
-            # 精密ひし形判定（ビューポート座標使用）
-            hit_result = self._is_point_in_diamond(mouse_x, mouse_y, viewport_x, viewport_y, tile, camera_state, win_width, win_height)
-            if hit_result:
-                
-                # マウス位置からタイル中心までの距離
-                center_x, center_y = self._get_tile_screen_center(viewport_x, viewport_y, tile, camera_state, win_width, win_height)
-                distance = math.sqrt((mouse_x - center_x) ** 2 + (mouse_y - center_y) ** 2)
-                
-                # デバッグログ出力
-                if self.debug_mode:
-                    dx = mouse_x - center_x
-                    dy = mouse_y - center_y
-                    self.logger.debug(f"HIT DETECTED - Mouse({mouse_x}, {mouse_y}) -> Tile({viewport_x}, {viewport_y})")
-                    self.logger.debug(f"  Tile height: {tile.height}")
-                    self.logger.debug(f"  Tile depth: {depth:.1f}")
-                    self.logger.debug(f"  Tile center: ({center_x:.1f}, {center_y:.1f})")
-                    self.logger.debug(f"  Mouse relative to center: dx={dx:.1f}, dy={dy:.1f}")
-                    self.logger.debug(f"  Distance from center: {distance:.1f}")
-                    self.logger.debug(f"  Map coordinates: ({map_x}, {map_y})")
-                    self.logger.debug(f"  Selected (Z-sort + height-sort priority)")
-                
-                # 最初にヒットしたタイルを選択（既にソート済みなので最優先）
-                best_hit = HitResult(
-                    grid_x=viewport_x,
-                    grid_y=viewport_y,
-                    map_x=map_x,
-                    map_y=map_y,
-                    depth=depth,
-                    distance_from_center=distance
-                )
-                break  # 最優先タイルが見つかったので終了
+            best_hit = HitResult(
+                grid_x=viewport_x,
+                grid_y=viewport_y,
+                map_x=map_x,
+                map_y=map_y,
+                depth=depth,
+                distance_sq_from_center=distance_sq
+            )
         
         # 結果をキャッシュ
         self._cache_result(cache_key, best_hit)
@@ -165,203 +202,146 @@ class MouseHitDetector:
         
         return None
     
-    def _get_candidate_tiles(self, mouse_x: int, mouse_y: int, camera_state, win_width: int, win_height: int) -> List[Tuple[int, int]]:
-        """
-        逆座標変換でマウス位置周辺の候補タイルを取得
-        
-        Args:
-            mouse_x, mouse_y: マウス座標
-            camera_state: カメラ状態
-            win_width, win_height: ウィンドウサイズ
-            
-        Returns:
-            候補タイル座標のリスト
-        """
-        center_x = win_width // 2
-        center_y = win_height // 2
-        
-        # ズームとオフセットを逆算
-        unzoomed_x = center_x + (mouse_x - center_x) / camera_state.zoom
-        unzoomed_y = center_y + (mouse_y - center_y) / camera_state.zoom
-        
-        # オフセットを除去
-        iso_x = unzoomed_x - center_x - camera_state.offset_x
-        iso_y = unzoomed_y - center_y - camera_state.offset_y
-        
-        # アイソメトリック座標からグリッド座標への逆変換
-        # iso_x = (grid_x - grid_y) * (cell_size / 2)
-        # iso_y = (grid_x + grid_y) * (cell_size / 4)
-        # これを解くと:
-        # grid_x = (iso_x / (cell_size / 2) + iso_y / (cell_size / 4)) / 2
-        # grid_y = (iso_y / (cell_size / 4) - iso_x / (cell_size / 2)) / 2
-        
-        half_cell = self.cell_size / 2
-        quarter_cell = self.cell_size / 4
-        
-        grid_x_float = (iso_x / half_cell + iso_y / quarter_cell) / 2
-        grid_y_float = (iso_y / quarter_cell - iso_x / half_cell) / 2
-        
-        # 回転を考慮した逆変換
-        if camera_state.rotation != 0:
-            angle_rad = -math.radians(camera_state.rotation)  # 逆回転
-            cos_angle = math.cos(angle_rad)
-            sin_angle = math.sin(angle_rad)
-            
-            # 回転中心（ビューポート中心）
-            viewport_size = self.viewport_manager.viewport_state.size
-            center = viewport_size // 2
-            
-            # 回転中心からの相対座標
-            rel_x = grid_x_float - center
-            rel_y = grid_y_float - center
-            
-            # 逆回転
-            unrotated_x = rel_x * cos_angle - rel_y * sin_angle
-            unrotated_y = rel_x * sin_angle + rel_y * cos_angle
-            
-            grid_x_float = unrotated_x + center
-            grid_y_float = unrotated_y + center
-        
-        # 候補タイルを周辺も含めて取得（精度向上のため）
-        base_x = int(grid_x_float)
-        base_y = int(grid_y_float)
-        
-        candidates = []
-        for dy in range(-2, 3):  # 5x5の範囲をチェック
-            for dx in range(-2, 3):
-                candidate_x = base_x + dx
-                candidate_y = base_y + dy
-                # ビューポート範囲内チェック
-                if 0 <= candidate_x < self.viewport_manager.viewport_state.size and 0 <= candidate_y < self.viewport_manager.viewport_state.size:
-                    candidates.append((candidate_x, candidate_y))
-        
-        return candidates
+    def _log_hit(self, mouse_x: int, mouse_y: int, grid_x: int, grid_y: int, height: int, depth: float,
+                 center_x: float, center_y: float, distance_sq: float, map_x: int, map_y: int):
+        """ヒットしたタイルの情報をデバッグログに出力"""
+        dx = mouse_x - center_x
+        dy = mouse_y - center_y
+        self.logger.debug(f"HIT DETECTED - Mouse({mouse_x}, {mouse_y}) -> Tile({grid_x}, {grid_y})")
+        self.logger.debug(f"  Tile height: {height}")
+        self.logger.debug(f"  Tile depth: {depth:.1f}")
+        self.logger.debug(f"  Tile center: ({center_x:.1f}, {center_y:.1f})")
+        self.logger.debug(f"  Mouse relative to center: dx={dx:.1f}, dy={dy:.1f}")
+        self.logger.debug(f"  Distance from center: {math.sqrt(distance_sq):.1f}")
+        self.logger.debug(f"  Map coordinates: ({map_x}, {map_y})")
+        self.logger.debug(f"  Selected (front-most in screen hash bucket)")
     
-    def _is_point_in_diamond(self, mouse_x: int, mouse_y: int, grid_x: int, grid_y: int, 
-                           tile, camera_state, win_width: int, win_height: int) -> bool:
+    def _update_screen_hash(self, camera_state, heights: List[int],
+                            screen_xs: Optional[List[float]] = None, screen_ys: Optional[List[float]] = None):
         """
-        精密なひし形内判定を実行
+        タイル上面のひし形を画面空間のバケット（32ピクセル四方）に登録する
+        
+        カメラ状態とビューポート位置が前回の構築時と同じなら何もしない。
+        タイルの内容が変わった場合は clear_cache() で作り直しを要求する。
         
         Args:
-            mouse_x, mouse_y: マウス座標
-            grid_x, grid_y: グリッド座標
-            tile: タイルオブジェクト
             camera_state: カメラ状態
-            win_width, win_height: ウィンドウサイズ
-            
-        Returns:
-            ひし形内にあるかどうか
+            heights: 現在のビューポートタイルの高さ（行優先の1次元リスト、インデックスは y * size + x）
+            screen_xs, screen_ys: 描画側で計算済みのタイル上面の画面座標（省略時はここで計算）
         """
-        # 実際のタイル高さで判定（描画とヒット判定の一致）
-        screen_coords = self.isometric_renderer.grid_to_iso(
-            grid_x, grid_y, tile.height, camera_state
-        )
-        
-        if screen_coords is None:
-            return False
-        
-        iso_x, iso_y = screen_coords
-        
-        # ズーム適用されたセルサイズ
-        scaled_cell_size = int(self.cell_size * camera_state.zoom)
-        
-        # ひし形の4頂点を計算（IsometricRenderer.calculate_diamond_vertices()と完全一致）
-        # 描画とヒット判定の一貫性を保つため、同じ計算式を使用
-        top = (iso_x + scaled_cell_size // 2, iso_y)
-        left = (iso_x, iso_y + scaled_cell_size // 4)
-        right = (iso_x + scaled_cell_size, iso_y + scaled_cell_size // 4)
-        bottom = (iso_x + scaled_cell_size // 2, iso_y + scaled_cell_size // 2)
-        
-        # デバッグログ出力
-        if self.debug_mode:
-            self.logger.debug(f"Diamond test for tile ({grid_x}, {grid_y}):")
-            self.logger.debug(f"  Tile height: {tile.height}")
-            self.logger.debug(f"  Screen coords (height={tile.height}): ({iso_x}, {iso_y})")
-            self.logger.debug(f"  Scaled cell size: {scaled_cell_size}")
-            self.logger.debug(f"  Diamond dimensions: width={scaled_cell_size}, height={scaled_cell_size // 2}")
-            self.logger.debug(f"  Diamond vertices: top{top}, left{left}, right{right}, bottom{bottom}")
-            self.logger.debug(f"  Mouse position: ({mouse_x}, {mouse_y})")
-        
-        # ひし形内判定（4つの三角形に分割して判定）
-        in_diamond = (self._point_in_triangle(mouse_x, mouse_y, top, left, bottom) or
-                      self._point_in_triangle(mouse_x, mouse_y, top, right, bottom) or
-                      self._point_in_triangle(mouse_x, mouse_y, left, bottom, right) or
-                      self._point_in_triangle(mouse_x, mouse_y, top, left, right))
-        
-        if self.debug_mode:
-            self.logger.debug(f"  Diamond hit test: {in_diamond}")
-        
-        return in_diamond
+        viewport_state = self.viewport_manager.viewport_state
+        hash_key = (camera_state.rotation, camera_state.zoom,
+                    camera_state.offset_x, camera_state.offset_y,
+                    camera_state.center_x, camera_state.center_y,
+                    viewport_state.x, viewport_state.y, viewport_state.size)
+        if hash_key == self._screen_hash_key:
+            return
+        
+        size = viewport_state.size
+        zoom = camera_state.zoom
+        center_x = camera_state.center_x
+        center_y = camera_state.center_y
+        offset_x = camera_state.offset_x
+        offset_y = camera_state.offset_y
+        height_unit = self.height_unit
+        scaled_cell_size = int(self.cell_size * zoom)
+        half_cell = scaled_cell_size // 2
+        
+        # 描画と同じ回転済み基準テーブルから画面座標と深度を求める（grid_to_iso()と同じ値）
+        base_x, base_y, base_depth = self.isometric_renderer.get_base_iso_table(camera_state.rotation, size)
+        
+        # 画面座標は描画側の計算結果があればそれを使う（同じ計算式なので値は一致する）
+        if screen_xs is None or screen_ys is None:
+            screen_xs = [center_x + bx * zoom + offset_x for bx in base_x]
+            screen_ys = [center_y + (by - height * height_unit) * zoom + offset_y
+                         for by, height in zip(base_y, heights)]
+        
+        # 行優先に並んだ平坦なリストをまとめて走査し、範囲内の全タイルの候補エントリを1つの内包表記で作る
+        # （ビューポートのタイルはすべて有効なので、座標ごとの範囲チェックは不要）
+        entries = [(depth - height * 0.1, height, index % size, index // size, iso_x, iso_y)
+                   for index, (depth, height, iso_x, iso_y)
+                   in enumerate(zip(base_depth, heights, screen_xs, screen_ys))]
+        
+        # 描画（App.draw_tile_scene()）と同じく深度だけをキーに安定ソートで奥から手前へ並べ、それを逆順にして
+        # 手前から奥の順にする（同じ深度では後に描かれる＝上に見えるタイルが先に来る）。
+        # その順でバケットへ振り分ける（各バケットは追加順のまま整列済みになり、バケットごとのソートが不要）
+        entries.sort(key=lambda entry: entry[0])
+        entries.reverse()
+        
+        screen_hash = {}
+        for entry in entries:
+            # 上面のひし形の外接矩形が掛かるバケットすべてに登録
+            left = int(entry[4])
+            top = int(entry[5])
+            for bucket_y in range(top >> SCREEN_HASH_SHIFT, ((top + half_cell) >> SCREEN_HASH_SHIFT) + 1):
+                for bucket_x in range(left >> SCREEN_HASH_SHIFT, ((left + scaled_cell_size) >> SCREEN_HASH_SHIFT) + 1):
+                    bucket = screen_hash.get((bucket_x, bucket_y))
+                    if bucket is None:
+                        screen_hash[(bucket_x, bucket_y)] = [entry]
+                    else:
+                        bucket.append(entry)
+        
+        self._screen_hash = screen_hash
+        self._screen_hash_key = hash_key
+        self._screen_hash_cell_size = scaled_cell_size
     
-    def _point_in_triangle(self, px: float, py: float, p1: Tuple[float, float], 
-                          p2: Tuple[float, float], p3: Tuple[float, float]) -> bool:
+    def _find_front_hit_debug(self, mouse_x: int, mouse_y: int, entries, half_width: int, half_height: int):
         """
-        点が三角形内にあるかどうかを判定
+        手前から順に候補を1つずつ判定し、判定の経過をログに出力する（デバッグ用）
         
-        Args:
-            px, py: 判定する点の座標
-            p1, p2, p3: 三角形の頂点
-            
-        Returns:
-            三角形内にあるかどうか
+        引数と戻り値は find_first_diamond_hit() と同じ
         """
-        x1, y1 = p1
-        x2, y2 = p2
-        x3, y3 = p3
-        
-        # 重心座標を使用した判定
-        denom = (y2 - y3) * (x1 - x3) + (x3 - x2) * (y1 - y3)
-        if abs(denom) < 1e-10:  # 三角形が退化している場合
-            return False
-        
-        a = ((y2 - y3) * (px - x3) + (x3 - x2) * (py - y3)) / denom
-        b = ((y3 - y1) * (px - x3) + (x1 - x3) * (py - y3)) / denom
-        c = 1 - a - b
-        
-        return 0 <= a <= 1 and 0 <= b <= 1 and 0 <= c <= 1
+        for entry in entries:
+            depth, height, grid_x, grid_y, iso_x, iso_y = entry
+            if self._is_point_in_diamond_debug(mouse_x, mouse_y, grid_x, grid_y, height,
+                                               iso_x, iso_y, half_width, half_height):
+                return entry
+        return None
     
-    def _get_tile_screen_center(self, grid_x: int, grid_y: int, tile, camera_state, 
-                               win_width: int, win_height: int) -> Tuple[float, float]:
+    def _is_point_in_diamond_debug(self, mouse_x: int, mouse_y: int, grid_x: int, grid_y: int, height: int,
+                                   iso_x: float, iso_y: float, half_width: int, half_height: int) -> bool:
         """
-        タイルのスクリーン座標中心を取得
+        精密なひし形内判定を実行（デバッグ用、判定の経過をログに出力）
         
         Args:
+            mouse_x, mouse_y: マウス座標
             grid_x, grid_y: グリッド座標
-            tile: タイルオブジェクト
-            camera_state: カメラ状態
-            win_width, win_height: ウィンドウサイズ
+            height: タイルの高さ
+            iso_x, iso_y: タイル上面の画面座標（描画と同じ値）
+            half_width, half_height: ひし形の横・縦の半径（ズーム適用済みのセルサイズの1/2と1/4）
             
         Returns:
-            スクリーン座標の中心
+            ひし形内にあるかどうか
         """
-        screen_coords = self.isometric_renderer.grid_to_iso(
-            grid_x, grid_y, tile.height, camera_state
-        )
+        center_x = iso_x + half_width
+        center_y = iso_y + half_height
         
-        if screen_coords is None:
-            return (0, 0)
+        self.logger.debug(f"Diamond test for tile ({grid_x}, {grid_y}):")
+        self.logger.debug(f"  Tile height: {height}")
+        self.logger.debug(f"  Screen coords (height={height}): ({iso_x}, {iso_y})")
+        self.logger.debug(f"  Diamond dimensions: width={half_width * 2}, height={half_height * 2}")
+        self.logger.debug(f"  Diamond center: ({center_x}, {center_y})")
+        self.logger.debug(f"  Mouse position: ({mouse_x}, {mouse_y})")
         
-        iso_x, iso_y = screen_coords
-        scaled_cell_size = int(self.cell_size * camera_state.zoom)
+        in_diamond = diamond_contains(mouse_x, mouse_y, center_x, center_y, half_width, half_height)
         
-        # ひし形の中心
-        center_x = iso_x + scaled_cell_size // 2
-        center_y = iso_y + scaled_cell_size // 4
+        self.logger.debug(f"  Diamond hit test: {in_diamond}")
         
-        return (center_x, center_y)
+        return in_diamond
     
-    def _cache_result(self, cache_key: Tuple[int, int], result: Optional[HitResult]):
+    def _cache_result(self, cache_key: Tuple[int, int, int, int, int], result: Optional[HitResult]):
         """結果をキャッシュに保存"""
         if len(self.result_cache) >= self.cache_max_size:
-            # 最古のエントリを削除（簡易LRU）
-            oldest_key = next(iter(self.result_cache))
-            del self.result_cache[oldest_key]
+            # 最も長く参照されていないエントリを削除（LRU）
+            self.result_cache.popitem(last=False)
         
         self.result_cache[cache_key] = result
     
     def clear_cache(self):
         """キャッシュをクリア"""
         self.result_cache.clear()
+        self._screen_hash.clear()
+        self._screen_hash_key = None
         self.hit_tests = 0
         self.successful_hits = 0
         self.cache_hits = 0
@@ -0,0 +1,82 @@
+"""
+MouseHitDetector のヒット判定が描画順と一致することの確認
+"""
+import unittest
+
+from isometric_renderer import IsometricRenderer, CameraState
+from mouse_hit_detector import MouseHitDetector, diamond_contains
+from viewport_manager import ViewportManager
+
+
+CELL_SIZE = 16
+HEIGHT_UNIT = 3
+VIEWPORT_SIZE = 16
+
+
+class _FlatTile:
+    """高さだけを持つテスト用タイル"""
+    def __init__(self, height):
+        self.height = height
+
+
+class _FlatMapGrid:
+    """全タイルが同じ高さのテスト用マップ"""
+    map_size = 256
+
+    def get_viewport_tiles(self, start_x, start_y, viewport_size=16):
+        return [[_FlatTile(1) for _ in range(viewport_size)] for _ in range(viewport_size)]
+
+    def get_tile(self, x, y):
+        return _FlatTile(1)
+
+
+class TestEqualDepthOverlap(unittest.TestCase):
+    """同じ深度で重なるタイルでは、上に描かれたタイルが選ばれること"""
+
+    def setUp(self):
+        self.renderer = IsometricRenderer(cell_size=CELL_SIZE, height_unit=HEIGHT_UNIT)
+        self.viewport_manager = ViewportManager(_FlatMapGrid(), viewport_size=VIEWPORT_SIZE)
+        self.detector = MouseHitDetector(self.renderer, self.viewport_manager,
+                                         cell_size=CELL_SIZE, height_unit=HEIGHT_UNIT)
+        # 135度では同じ深度のタイル同士が画面上で重なる
+        self.camera_state = CameraState(rotation=135.0, zoom=1.0, center_x=128, center_y=96)
+
+    def _draw_order(self, heights):
+        """App.draw_tile_scene() と同じ描画順（深度の昇順、安定ソート）"""
+        _, _, base_depth = self.renderer.get_base_iso_table(self.camera_state.rotation, VIEWPORT_SIZE)
+        depths = [depth - height * 0.1 for depth, height in zip(base_depth, heights)]
+        return depths, sorted(range(len(depths)), key=depths.__getitem__)
+
+    def _contains(self, index, heights, px, py):
+        iso_x, iso_y = self.renderer.grid_to_iso(index % VIEWPORT_SIZE, index // VIEWPORT_SIZE,
+                                                 heights[index], self.camera_state)
+        half_width = CELL_SIZE // 2
+        half_height = CELL_SIZE // 4
+        return diamond_contains(px, py, iso_x + half_width, iso_y + half_height, half_width, half_height)
+
+    def _find_tied_overlap(self, heights):
+        """手前2枚が同じ深度のタイルになる画素と、その2枚を描画順で返す"""
+        depths, order = self._draw_order(heights)
+        for index in order:
+            iso_x, iso_y = self.renderer.grid_to_iso(index % VIEWPORT_SIZE, index // VIEWPORT_SIZE,
+                                                     heights[index], self.camera_state)
+            # タイル上面の外接矩形内の画素だけを調べる
+            for py in range(int(iso_y), int(iso_y) + CELL_SIZE // 2 + 1):
+                for px in range(int(iso_x), int(iso_x) + CELL_SIZE + 1):
+                    covering = [other for other in order if self._contains(other, heights, px, py)]
+                    if len(covering) >= 2 and depths[covering[-1]] == depths[covering[-2]]:
+                        return px, py, covering[-2], covering[-1]
+        self.fail("同じ深度で重なるタイルが見つからない")
+
+    def test_returns_tile_drawn_on_top(self):
+        heights = self.viewport_manager.current_heights
+        px, py, below, above = self._find_tied_overlap(heights)
+
+        hit = self.detector.get_tile_at_mouse(px, py, self.camera_state, heights)
+
+        self.assertEqual(hit, (above % VIEWPORT_SIZE, above // VIEWPORT_SIZE))
+        self.assertNotEqual(hit, (below % VIEWPORT_SIZE, below // VIEWPORT_SIZE))
+
+
+if __name__ == "__main__":
+    unittest.main()
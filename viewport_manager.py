@@ -1,28 +1,69 @@
 """
 ビューポート管理の最適化とモジュール化
 """
+from collections import OrderedDict
+from functools import lru_cache
 from typing import List, Tuple, Optional, Dict, Any
-from dataclasses import dataclass
 import json
 
 
-@dataclass
+# タイルキャッシュのキーを (y << 8) | x の整数にまとめるためのシフト量（マップ座標は0〜255）
+TILE_KEY_SHIFT = 8
+
+# ビューポートキャッシュに保持するビューポート数（小さめ）
+VIEWPORT_CACHE_SIZE = 20
+
+
 class ViewportState:
-    """ビューポート状態を管理するデータクラス"""
-    x: int = 120  # マップ内のX位置
-    y: int = 120  # マップ内のY位置
-    size: int = 16  # ビューポートサイズ（16x16）
+    """ビューポート状態を管理するクラス（__slots__で属性を固定し、インスタンス辞書を持たない）"""
+    __slots__ = ("x", "y", "size")
+    
+    def __init__(self, x: int = 120, y: int = 120, size: int = 16, map_size: int = 256):
+        """
+        初期化（位置はマップ内に収まるように補正する）
+        
+        Args:
+            x, y: マップ内の位置
+            size: ビューポートサイズ（16x16）
+            map_size: マップサイズ
+        """
+        self.x = max(0, min(x, map_size - size))
+        self.y = max(0, min(y, map_size - size))
+        self.size = size
+    
+    def __repr__(self) -> str:
+        return f"ViewportState(x={self.x}, y={self.y}, size={self.size})"
+
+
+def compute_preload_coords(current_x: int, current_y: int, size: int, radius: int,
+                           map_size: int = 256) -> List[Tuple[int, int]]:
+    """
+    事前読み込みするビューポートの開始座標を列挙
+    
+    X・Yそれぞれでマップ内に収まる開始座標を求めてから組み合わせる（(2r+1)^2 個の候補を1つずつ調べない）
     
-    def __post_init__(self):
-        """初期化後の検証"""
-        self.x = max(0, min(self.x, 256 - self.size))
-        self.y = max(0, min(self.y, 256 - self.size))
+    Args:
+        current_x, current_y: 現在のビューポート開始座標
+        size: ビューポートサイズ
+        radius: 事前読み込み半径（ビューポートサイズ単位）
+        map_size: マップサイズ
+        
+    Returns:
+        事前読み込みするビューポートの開始座標 (x, y) のリスト
+    """
+    max_start = map_size - size
+    xs = [current_x + dx * size for dx in range(-radius, radius + 1)
+          if 0 <= current_x + dx * size <= max_start]
+    ys = [current_y + dy * size for dy in range(-radius, radius + 1)
+          if 0 <= current_y + dy * size <= max_start]
+    return [(x, y) for y in ys for x in xs]
 
 
 class ViewportManager:
     """ビューポート管理の最適化クラス"""
     
-    def __init__(self, map_grid, viewport_size: int = 16, cache_size: int = 100):
+    def __init__(self, map_grid, viewport_size: int = 16, cache_size: int = 100,
+                 enable_tile_cache: bool = False):
         """
         初期化
         
@@ -30,44 +71,57 @@ class ViewportManager:
             map_grid: マップグリッドオブジェクト
             viewport_size: ビューポートサイズ
             cache_size: キャッシュサイズ（LRU）
+            enable_tile_cache: get_tile_cached()でタイル単位のキャッシュを使うかどうか
+                （ビューポートはMapGridの行から直接切り出してビューポートキャッシュに保持するため、
+                 タイルキャッシュは同じタイルを重複して持つだけになる。既定では使わない）
         """
         self.map_grid = map_grid
         self.viewport_size = viewport_size
         self.cache_size = cache_size
+        self.enable_tile_cache = enable_tile_cache
+        
+        # マップサイズ（マップグリッドが保持する値を使う）
+        self._map_size = map_grid.map_size
         
         # ビューポート状態
-        self.viewport_state = ViewportState(size=viewport_size)
+        self.viewport_state = ViewportState(size=viewport_size, map_size=self._map_size)
+        
+        # ビューポート開始座標の上限（サイズは固定なので一度だけ計算する）
+        self._max_xy = self._map_size - viewport_size
+        
+        # ビューポートの境界 (min_x, min_y, max_x, max_y)（位置が変わった時だけ計算し直す）
+        self._bounds: Tuple[int, int, int, int] = (0, 0, 0, 0)
+        self._recompute_bounds()
         
-        # タイルキャッシュ（LRU方式）
-        self.tile_cache: Dict[Tuple[int, int], Any] = {}
-        self.cache_access_order: List[Tuple[int, int]] = []
+        # タイルキャッシュ（LRU方式、挿入順 = アクセス順で先頭が最も古い）
+        # キーは (y << TILE_KEY_SHIFT) | x の整数（タプルの生成とハッシュ計算を省く）
+        self.tile_cache: "OrderedDict[int, Any]" = OrderedDict()
         
-        # ビューポートキャッシュ
-        self.viewport_cache: Dict[Tuple[int, int, int], List[List[Any]]] = {}
-        self.viewport_access_order: List[Tuple[int, int, int]] = []
+        # ビューポートキャッシュ（LRU方式）
+        # 生成はMapGridの行スライスだけなので、LRUの管理はC実装のfunctools.lru_cacheに任せる
+        self._build_viewport = lru_cache(maxsize=VIEWPORT_CACHE_SIZE)(map_grid.get_viewport_tiles)
         
         # 統計情報
         self.cache_hits = 0
         self.cache_misses = 0
-        self.viewport_cache_hits = 0
-        self.viewport_cache_misses = 0
         
-        # 現在のビューポートタイル
-        self.current_tiles = None
-        self._update_current_tiles()
+        # 現在のビューポートタイルと、そのタイル・高さを1次元に並べたリスト（インデックスは y * size + x）
+        # 位置の変更やキャッシュのクリアでは汚れフラグを立てるだけにして、次に参照された時に一度だけ作り直す
+        self._current_tiles = None
+        self._current_tiles_flat: List[Any] = []
+        self._current_heights: List[int] = []
+        self._current_dirty = True
     
-    def _update_lru_cache(self, cache_dict: Dict, access_order: List, key: Any, value: Any, max_size: int):
+    def _update_lru_cache(self, cache_dict: OrderedDict, key: Any, value: Any, max_size: int):
         """LRUキャッシュの更新"""
         if key in cache_dict:
-            # 既存キーの場合、アクセス順序を更新
-            access_order.remove(key)
+            # 既存キーの場合、アクセス順序を更新（末尾へ移動）
+            cache_dict.move_to_end(key)
         elif len(cache_dict) >= max_size:
-            # キャッシュが満杯の場合、最古のエントリを削除
-            oldest_key = access_order.pop(0)
-            del cache_dict[oldest_key]
+            # キャッシュが満杯の場合、最古のエントリ（先頭）を削除
+            cache_dict.popitem(last=False)
         
         cache_dict[key] = value
-        access_order.append(key)
     
     def get_tile_cached(self, x: int, y: int) -> Any:
         """
@@ -79,23 +133,29 @@ class ViewportManager:
         Returns:
             タイルオブジェクト
         """
-        cache_key = (x, y)
+        # タイルキャッシュ無効時はキャッシュも統計も通さずに取得する（無効なキャッシュのヒット率を0%と報告しない）
+        if not self.enable_tile_cache:
+            return self.map_grid.get_tile(x, y)
+        
+        # 整数キーが他の座標と重なるマップ外の座標は、キャッシュを通さずに取得する
+        # （負の値も 256 以上の値も右シフトすると0以外になる）
+        if x >> TILE_KEY_SHIFT or y >> TILE_KEY_SHIFT:
+            self.cache_misses += 1
+            return self.map_grid.get_tile(x, y)
+        
+        cache_key = (y << TILE_KEY_SHIFT) | x
         
         if cache_key in self.tile_cache:
             self.cache_hits += 1
             # アクセス順序を更新
-            self.cache_access_order.remove(cache_key)
-            self.cache_access_order.append(cache_key)
+            self.tile_cache.move_to_end(cache_key)
             return self.tile_cache[cache_key]
         
         self.cache_misses += 1
         tile = self.map_grid.get_tile(x, y)
         
         if tile is not None:
-            self._update_lru_cache(
-                self.tile_cache, self.cache_access_order, 
-                cache_key, tile, self.cache_size
-            )
+            self._update_lru_cache(self.tile_cache, cache_key, tile, self.cache_size)
         
         return tile
     
@@ -110,52 +170,57 @@ class ViewportManager:
         Returns:
             ビューポートタイル配列
         """
-        cache_key = (start_x, start_y, size)
-        
-        if cache_key in self.viewport_cache:
-            self.viewport_cache_hits += 1
-            # アクセス順序を更新
-            self.viewport_access_order.remove(cache_key)
-            self.viewport_access_order.append(cache_key)
-            return self.viewport_cache[cache_key]
-        
-        self.viewport_cache_misses += 1
-        
-        # ビューポートタイルを生成
-        viewport = []
-        for y in range(size):
-            row = []
-            for x in range(size):
-                map_x = start_x + x
-                map_y = start_y + y
-                tile = self.get_tile_cached(map_x, map_y)
-                
-                if tile is None:
-                    # 範囲外の場合はダミータイルを作成
-                    from main import Tile  # 循環インポートを避けるため
-                    import pyxel
-                    tile = Tile(
-                        floor_id=f"{map_x:03d}_{map_y:03d}",
-                        height=1,
-                        attribute=0,
-                        color=pyxel.COLOR_BLACK
-                    )
-                row.append(tile)
-            viewport.append(row)
-        
-        # ビューポートキャッシュに保存
-        self._update_lru_cache(
-            self.viewport_cache, self.viewport_access_order,
-            cache_key, viewport, 20  # ビューポートキャッシュは小さめ
-        )
-        
-        return viewport
+        # ビューポートタイルを生成（MapGridが範囲外タイルの枠付きで保持する行から、行単位のスライスで切り出す）
+        return self._build_viewport(start_x, start_y, size)
+    
+    @property
+    def viewport_cache_hits(self) -> int:
+        """ビューポートキャッシュのヒット回数"""
+        return self._build_viewport.cache_info().hits
+    
+    @property
+    def viewport_cache_misses(self) -> int:
+        """ビューポートキャッシュのミス回数"""
+        return self._build_viewport.cache_info().misses
+    
+    def _recompute_bounds(self):
+        """ビューポートの境界を現在の位置から計算し直す"""
+        x = self.viewport_state.x
+        y = self.viewport_state.y
+        size = self.viewport_state.size
+        self._bounds = (x, y, x + size - 1, y + size - 1)
     
     def _update_current_tiles(self):
         """現在のビューポートタイルを更新"""
-        self.current_tiles = self.get_viewport_tiles_cached(
+        self._current_tiles = self.get_viewport_tiles_cached(
             self.viewport_state.x, self.viewport_state.y, self.viewport_state.size
         )
+        # 行優先に走査する処理が行ごとのリストを辿らずに済むよう、タイルは移動時に一度だけ1次元に展開する
+        self._current_tiles_flat = [tile for row in self._current_tiles for tile in row]
+        # 描画やヒット判定がタイルごとに属性を読まずに済むよう、高さも同時に展開する
+        self._current_heights = [tile.height for tile in self._current_tiles_flat]
+        self._current_dirty = False
+    
+    @property
+    def current_tiles(self) -> List[List[Any]]:
+        """現在のビューポートタイル（位置の変更後、最初の参照時に作り直す）"""
+        if self._current_dirty:
+            self._update_current_tiles()
+        return self._current_tiles
+    
+    @property
+    def current_tiles_flat(self) -> List[Any]:
+        """現在のビューポートタイルを行優先の1次元に並べたリスト"""
+        if self._current_dirty:
+            self._update_current_tiles()
+        return self._current_tiles_flat
+    
+    @property
+    def current_heights(self) -> List[int]:
+        """現在のビューポートタイルの高さを行優先の1次元に並べたリスト"""
+        if self._current_dirty:
+            self._update_current_tiles()
+        return self._current_heights
     
     def move_viewport(self, dx: int, dy: int) -> bool:
         """
@@ -170,14 +235,16 @@ class ViewportManager:
         new_x = self.viewport_state.x + dx
         new_y = self.viewport_state.y + dy
         
-        # 範囲チェック
-        new_x = max(0, min(new_x, 256 - self.viewport_state.size))
-        new_y = max(0, min(new_y, 256 - self.viewport_state.size))
+        # 範囲チェック（組み込みのmin/maxを呼ばず比較だけで0〜上限に収める）
+        max_xy = self._max_xy
+        new_x = 0 if new_x < 0 else (max_xy if new_x > max_xy else new_x)
+        new_y = 0 if new_y < 0 else (max_xy if new_y > max_xy else new_y)
         
         if new_x != self.viewport_state.x or new_y != self.viewport_state.y:
             self.viewport_state.x = new_x
             self.viewport_state.y = new_y
-            self._update_current_tiles()
+            self._recompute_bounds()
+            self._current_dirty = True
             return True
         
         return False
@@ -193,14 +260,16 @@ class ViewportManager:
         Returns:
             位置が変更されたかどうか
         """
-        # 範囲チェック
-        x = max(0, min(x, 256 - self.viewport_state.size))
-        y = max(0, min(y, 256 - self.viewport_state.size))
+        # 範囲チェック（組み込みのmin/maxを呼ばず比較だけで0〜上限に収める）
+        max_xy = self._max_xy
+        x = 0 if x < 0 else (max_xy if x > max_xy else x)
+        y = 0 if y < 0 else (max_xy if y > max_xy else y)
         
         if x != self.viewport_state.x or y != self.viewport_state.y or force_update:
             self.viewport_state.x = x
             self.viewport_state.y = y
-            self._update_current_tiles()
+            self._recompute_bounds()
+            self._current_dirty = True
             return True
         
         return False
@@ -209,22 +278,21 @@ class ViewportManager:
         """現在のビューポートタイルを取得"""
         return self.current_tiles
     
+    def get_current_tiles_flat(self) -> List[Any]:
+        """現在のビューポートタイルを行優先の1次元リスト（インデックスは y * size + x）で取得"""
+        return self.current_tiles_flat
+    
     def get_viewport_position(self) -> Tuple[int, int]:
         """現在のビューポート位置を取得"""
         return self.viewport_state.x, self.viewport_state.y
     
     def get_viewport_bounds(self) -> Tuple[int, int, int, int]:
         """ビューポートの境界を取得 (min_x, min_y, max_x, max_y)"""
-        return (
-            self.viewport_state.x,
-            self.viewport_state.y,
-            self.viewport_state.x + self.viewport_state.size - 1,
-            self.viewport_state.y + self.viewport_state.size - 1
-        )
+        return self._bounds
     
     def is_position_in_viewport(self, map_x: int, map_y: int) -> bool:
         """指定された座標がビューポート内にあるかチェック"""
-        min_x, min_y, max_x, max_y = self.get_viewport_bounds()
+        min_x, min_y, max_x, max_y = self._bounds
         return min_x <= map_x <= max_x and min_y <= map_y <= max_y
     
     def map_to_viewport_coords(self, map_x: int, map_y: int) -> Optional[Tuple[int, int]]:
@@ -261,19 +329,25 @@ class ViewportManager:
     def clear_cache(self):
         """全キャッシュをクリア"""
         self.tile_cache.clear()
-        self.cache_access_order.clear()
-        self.viewport_cache.clear()
-        self.viewport_access_order.clear()
+        self._build_viewport.cache_clear()  # ヒット・ミス回数もリセットされる
         self.cache_hits = 0
         self.cache_misses = 0
-        self.viewport_cache_hits = 0
-        self.viewport_cache_misses = 0
         
-        # current_tilesも強制的に更新
-        self._update_current_tiles()
+        # current_tilesも次の参照時に作り直す
+        self._current_dirty = True
+    
+    def get_cache_counters(self) -> Tuple[int, int, int, int]:
+        """
+        キャッシュのヒット・ミス回数をそのまま取得（毎フレームの表示用、辞書の生成や割り算を行わない）
+        
+        Returns:
+            (タイルキャッシュヒット, タイルキャッシュミス, ビューポートキャッシュヒット, ビューポートキャッシュミス)
+        """
+        viewport_info = self._build_viewport.cache_info()
+        return self.cache_hits, self.cache_misses, viewport_info.hits, viewport_info.misses
     
     def get_cache_stats(self) -> Dict[str, Any]:
-        """キャッシュ統計を取得"""
+        """キャッシュ統計を取得（調査用。毎フレーム参照する場合は get_cache_counters() を使う）"""
         total_requests = self.cache_hits + self.cache_misses
         viewport_total = self.viewport_cache_hits + self.viewport_cache_misses
         
@@ -282,7 +356,7 @@ class ViewportManager:
             'tile_cache_hits': self.cache_hits,
             'tile_cache_misses': self.cache_misses,
             'tile_cache_ratio': self.cache_hits / total_requests * 100 if total_requests > 0 else 0,
-            'viewport_cache_size': len(self.viewport_cache),
+            'viewport_cache_size': self._build_viewport.cache_info().currsize,
             'viewport_cache_hits': self.viewport_cache_hits,
             'viewport_cache_misses': self.viewport_cache_misses,
             'viewport_cache_ratio': self.viewport_cache_hits / viewport_total * 100 if viewport_total > 0 else 0,
@@ -300,18 +374,11 @@ class ViewportManager:
         current_x, current_y = self.get_viewport_position()
         size = self.viewport_state.size
         
-        for dy in range(-radius, radius + 1):
-            for dx in range(-radius, radius + 1):
-                preload_x = current_x + dx * size
-                preload_y = current_y + dy * size
-                
-                # 範囲内の場合のみ事前読み込み
-                if (0 <= preload_x <= 256 - size and 
-                    0 <= preload_y <= 256 - size):
-                    self.get_viewport_tiles_cached(preload_x, preload_y, size)
+        # 範囲内の開始座標だけを先に列挙してから読み込む
+        for preload_x, preload_y in compute_preload_coords(current_x, current_y, size, radius, self._map_size):
+            self.get_viewport_tiles_cached(preload_x, preload_y, size)
     
     def reset_to_center(self):
         """ビューポートを中央にリセット"""
-        center_x = (256 - self.viewport_state.size) // 2
-        center_y = (256 - self.viewport_state.size) // 2
-        self.set_viewport_position(center_x, center_y)
+        center = self._max_xy // 2
+        self.set_viewport_position(center, center)